@@ -1,9 +1,61 @@
+import os
 import time
 import json
 import threading
-import time
 import datetime
 
+try:
+    # Faster json parsing and serialization if orjson is installed. Both paths write the same 2 space indented
+    # layout, orjson can't indent with 4. NaN and Infinity are written as null by orjson.
+    import orjson
+
+    def _json_loads(data: bytes):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson only accepts strict JSON, let the stdlib parser handle NaN/Infinity or raise the error
+            return json.loads(data)
+
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    orjson = None
+
+    def _json_loads(data: bytes):
+        return json.loads(data)
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, indent=2).encode()
+
+try:
+    # Event driven file watching (inotify on Linux, ReadDirectoryChangesW on Windows)
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+class _ConfigFileEventHandler(FileSystemEventHandler):
+    """Forward modify, create and move events on the configuration file to the ConfigurationManager."""
+    def __init__(self, config_manager):
+        super().__init__()
+        self._config_manager = config_manager
+        self._path = os.path.abspath(config_manager.config_file_path)
+
+    def on_modified(self, event):
+        if not event.is_directory and os.path.abspath(event.src_path) == self._path:
+            self._config_manager._reload_if_changed()
+
+    def on_created(self, event):
+        # Some editors save by deleting and re-creating the file
+        if not event.is_directory and os.path.abspath(event.src_path) == self._path:
+            self._config_manager._reload_if_changed()
+
+    def on_moved(self, event):
+        # Atomic saves rename a temporary file over the configuration file
+        if not event.is_directory and os.path.abspath(event.dest_path) == self._path:
+            self._config_manager._reload_if_changed()
+
 class ConfigurationManager:
     """ConfigurationManager
     
@@ -17,7 +69,8 @@ class ConfigurationManager:
     `watch_file` : bool
         If true, start a thread that watch the json configuration file. 
     `file_watcher_delay` : float
-        Time between each check of configuration file. Adjust this to get the best performance.
+        Time between each check of configuration file. With watchdog installed the file is watched through
+        OS events and this is only how long is_updated() stays True after a change.
     Returns
     any : object
         ConfigurationManager object.
@@ -26,6 +79,12 @@ class ConfigurationManager:
         self.config_file_path = config_file_path
         self.file_watcher_delay = file_watcher_delay
         self.file_change = False
+        self._change_time = 0.0
+        # Guards self.config and self._last_stamp, shared between the program and the file watcher
+        self._lock = threading.RLock()
+        self._last_stamp = self._file_stamp()
+        # (hash of the payload, file stamp) of the last save from this process
+        self._last_saved = None
         self.config: dict = self.load_config()
 
         if watch_file:
@@ -44,12 +103,16 @@ class ConfigurationManager:
         #Wait until the thread terminates.
         self.config_watcher_thread.join()
     
+    def _read_config(self):
+        """Read and parse the JSON file. Raises FileNotFoundError or ValueError if it can't be loaded."""
+        with open(self.config_file_path, "rb") as f:
+            config: dict = _json_loads(f.read())
+            return config
+
     def load_config(self):
         """Load configuration data from the JSON file."""
         try:
-            with open(self.config_file_path, "r") as f:
-                config: dict = json.load(f)
-                return config
+            return self._read_config()
         except FileNotFoundError:
             # If the file doesn't exist, create an new config
             return {}
@@ -57,11 +120,20 @@ class ConfigurationManager:
     def get(self, key):
         # type: (str) -> dict
         """Gets the value from a given key."""
-        return self.config.get(key)
+        with self._lock:
+            return self.config.get(key)
+
+    def get_many(self, keys):
+        # type: (list[str]) -> dict
+        """Gets the values from several keys at once, all read from the same configuration."""
+        with self._lock:
+            config = self.config
+            return {key: config.get(key) for key in keys}
 
     def set(self, key, value):
         """Update a configuration key with a new value."""
-        self.config[key] = value
+        with self._lock:
+            self.config[key] = value
 
     def is_updated(self):
         """Return True if the configuration json file is updated."""
@@ -69,27 +141,97 @@ class ConfigurationManager:
 
     def _save_config(self, config: dict):
         """Save the updated configuration back to the JSON file."""
-        with open(self.config_file_path, "w") as f:
-            json.dump(config, f, indent=4)
+        with self._lock:
+            data = _json_dumps(config)
+            data_hash = hash(data)
+            if self._last_saved is not None and self._last_saved == (data_hash, self._file_stamp()):
+                # Nothing changed since the last save and the file is untouched, skip the write
+                return
+            # Write to a temporary file and rename it so the file watcher never reads a half written file
+            tmp_path = self.config_file_path + ".tmp"
+            try:
+                # Buffered write of the single payload raises on a short write, fsync so a crash can't leave an
+                # empty file behind after the rename
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                    stat = os.fstat(f.fileno())
+                os.replace(tmp_path, self.config_file_path)
+            except OSError:
+                # E.g. PermissionError on Windows when another process has the file open
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+            # Saved by this process, no need for the file watcher to reload it. The rename keeps the mtime and
+            # the watcher is held off by the lock until the stamp is updated.
+            self._last_stamp = (stat.st_mtime_ns, stat.st_size)
+            self._last_saved = (data_hash, self._last_stamp)
 
     def save_config(self):
         """Save the updated configuration back to the JSON file."""
-        with open(self.config_file_path, "w") as f:
-            json.dump(self.config, f, indent=4)
+        with self._lock:
+            self._save_config(self.config)
+
+    def _file_stamp(self):
+        """Return (mtime, size) of the configuration file, or None if the file doesn't exist."""
+        try:
+            stat = os.stat(self.config_file_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _reload_if_changed(self):
+        """Reload the configuration file and flag that it has been changed if mtime or size differs."""
+        with self._lock:
+            stamp = self._file_stamp()
+            if stamp is not None and stamp != self._last_stamp:
+                try:
+                    # Only parsed when the stamp changed, an unchanged file keeps the current config
+                    config = self._read_config()
+                except (FileNotFoundError, ValueError):
+                    # Half written file from a non atomic save, or the file was removed after the stat by an
+                    # editor that deletes and re-creates it. Keep the current config and try again on the next change
+                    return
+                print("File was modified! Reloading it...")
+                self._last_stamp = stamp
+                self.config = config
+                # The file no longer holds what this process saved last
+                self._last_saved = None
+                self._change_time = time.monotonic()
+                self.file_change = True
 
     def fileWatcher(self):
         """Watching for changes in json file and if file is change, reloade the file for the program."""
-        f = open(self.config_file_path)
-        comandosText = f.read()
-        f.close()
+        if Observer is None:
+            self._pollFileWatcher()
+            return
+        observer = Observer()
+        observer.schedule(_ConfigFileEventHandler(self), os.path.dirname(os.path.abspath(self.config_file_path)))
+        observer.start()
+        # The observer thread does the watching, only clear the change flag here until stop() is called
+        while True:
+            timeout = self.file_watcher_delay
+            with self._lock:
+                if self.file_change:
+                    # Keep the flag for a full delay after the change was detected
+                    remaining = self._change_time + self.file_watcher_delay - time.monotonic()
+                    if remaining > 0:
+                        timeout = remaining
+                    else:
+                        self.file_change = False
+            if self.stop_event.wait(timeout):
+                break
+        observer.stop()
+        observer.join()
+
+    def _pollFileWatcher(self):
+        """Fallback file watcher that poll the modification time of the json file."""
         while not self.stop_event.is_set():
-            f = open(self.config_file_path)
-            content = f.read()
-            f.close()
-            if content != comandosText:
-                print("File was modified! Reloading it...")
-                comandosText = content
-                self.config = self.load_config()
-                self.file_change = True
-            time.sleep(self.file_watcher_delay)
+            self._reload_if_changed()
+            # Wake up directly when stop() is called instead of sleeping the full delay
+            if self.stop_event.wait(self.file_watcher_delay):
+                break
             self.file_change = False
@@ -1,5 +1,4 @@
-from thorlabs_tsi_sdk.tl_camera import TLCameraSDK, OPERATION_MODE
-from thorlabs_tsi_sdk.tl_camera import TLCameraSDK, TLCamera, Frame
+from thorlabs_tsi_sdk.tl_camera import TLCameraSDK, TLCamera, Frame, OPERATION_MODE
 from thorlabs_tsi_sdk.tl_camera_enums import SENSOR_TYPE
 from thorlabs_tsi_sdk.tl_mono_to_color_processor import MonoToColorProcessorSDK
 
@@ -13,10 +12,10 @@ except ImportError:
 from PIL import Image
 import threading
 import queue
+import collections
 from PyQt6.QtCore import pyqtSignal, QObject
 
 from src.com import ConfigurationManager
-from main import ImageUpdateSignal
 
 class ImageUpdateSignal(QObject):
     new_image = pyqtSignal(bool)
@@ -29,10 +28,11 @@ class ImageAcquisitionThread(threading.Thread):
     """ ImageAcquisitionThread
 
     This class derives from threading.Thread and is given a TLCamera instance during initialization. When started, the 
-    thread continuously acquires frames from the camera and converts them to PIL Image objects. These are placed in a 
-    queue.Queue object that can be retrieved using get_output_queue(). The thread doesn't do any arming or triggering, 
-    so users will still need to setup and control the camera from a different thread. Be sure to call stop() when it is 
-    time for the thread to stop.
+    thread continuously acquires frames from the camera and converts them to PIL Image objects. These are placed in the 
+    shared queue.Queue, or if no queue is given, in a collections.deque(maxlen=2). Both can be retrieved using 
+    get_output_queue() and when full, the oldest image is dropped to make room for the newest. The thread doesn't do 
+    any arming or triggering, so users will still need to setup and control the camera from a different thread. Be 
+    sure to call stop() when it is time for the thread to stop.
 
     This class is a modified version of Thorlabs own ImageAcquisitionThread which can be found in 
     Scientific_Camera_Interfaces/SDK/Python_Toolkit/examples/tkinter_camera_live_view.py. This folder can be downloaded 
@@ -49,8 +49,11 @@ class ImageAcquisitionThread(threading.Thread):
 
         if shared_queue != None:
             self._image_queue = shared_queue
+            self._is_deque = False
         else:
-            self._image_queue = queue.Queue(maxsize=2)
+            # Latest-wins ring of 2 images, append drops the oldest image without locking or raising
+            self._image_queue = collections.deque(maxlen=2)
+            self._is_deque = True
 
         # setup color processing if necessary
         if self._camera.camera_sensor_type != SENSOR_TYPE.BAYER:
@@ -60,6 +63,8 @@ class ImageAcquisitionThread(threading.Thread):
             self._mono_to_color_sdk = MonoToColorProcessorSDK()
             self._image_width = self._camera.image_width_pixels
             self._image_height = self._camera.image_height_pixels
+            # Last image buffer whose size was verified
+            self._last_buf = None
             self._mono_to_color_processor = self._mono_to_color_sdk.create_mono_to_color_processor(
                 SENSOR_TYPE.BAYER,
                 self._camera.color_filter_array_phase,
@@ -70,11 +75,14 @@ class ImageAcquisitionThread(threading.Thread):
             self._is_color = True
 
         self._bit_depth = camera.bit_depth
-        self._camera.image_poll_timeout_ms = 0  # Do not want to block for long periods of time
+        # The SDK always deliver the mono image buffer as unsigned 16-bit ints, regardless of bit depth
+        self._mono_mode = 'I;16'
+        # Block in the SDK for up to 100 ms waiting for a frame instead of spin polling, still short enough for stop()
+        self._camera.image_poll_timeout_ms = 100
         self._stop_event = threading.Event()
 
     def get_output_queue(self):
-        # type: ignore # type: (type(None)) -> queue.Queue
+        # type: ignore # type: (type(None)) -> queue.Queue|collections.deque
         return self._image_queue
 
     def stop(self):
@@ -82,47 +90,62 @@ class ImageAcquisitionThread(threading.Thread):
 
     def _get_color_image(self, frame):
         # type: (Frame) -> Image
-        # verify the image size
-        width = frame.image_buffer.shape[1]
-        height = frame.image_buffer.shape[0]
-        if (width != self._image_width) or (height != self._image_height):
-            self._image_width = width
-            self._image_height = height
-            print("Image dimension change detected, image acquisition thread was updated")
+        buf = frame.image_buffer
+        # verify the image size, only needed when the SDK hands out a new buffer
+        if buf is not self._last_buf:
+            height, width = buf.shape
+            if (width != self._image_width) or (height != self._image_height):
+                self._image_width = width
+                self._image_height = height
+                print("Image dimension change detected, image acquisition thread was updated")
+            self._last_buf = buf
         # color the image. transform_to_24 will scale to 8 bits per channel
-        color_image_data = self._mono_to_color_processor.transform_to_24(frame.image_buffer,
+        color_image_data = self._mono_to_color_processor.transform_to_24(buf,
                                                                          self._image_width,
                                                                          self._image_height)
-        color_image_data = color_image_data.reshape(self._image_height, self._image_width, 3)
-        # return PIL Image object
-        return Image.fromarray(color_image_data, mode='RGB')
+        # return PIL Image object built straight from the flat buffer. PIL can't map 'RGB' memory directly, so this
+        # is a single C-level copy into a new image, which is safe to queue while the next frame is processed
+        return Image.frombuffer('RGB', (self._image_width, self._image_height), color_image_data, 'raw', 'RGB', 0, 1)
 
     def _get_image(self, frame):
         # type: (Frame) -> Image
         scaled_image = frame.image_buffer
-        return Image.fromarray(scaled_image)
+        height, width = scaled_image.shape
+        if not scaled_image.flags['C_CONTIGUOUS']:
+            scaled_image = scaled_image.tobytes()
+        # wrap the buffer directly, skipping the mode inference done by Image.fromarray
+        return Image.frombuffer(self._mono_mode, (width, height), scaled_image, 'raw', self._mono_mode, 0, 1)
 
     def run(self):
-        nr = 0 # number of images in queue
+        nr = 0 # toggles between 0 and 1 for every image, 0 when a pair of images has been acquired
         # If signal not given, just keep acquireing 
         emit_signal = True if self._signal != None else False
         while not self._stop_event.is_set():
             try:
                 frame = self._camera.get_pending_frame_or_null()
                 if frame is not None:
-                    nr += 1
                     if self._is_color:
                         pil_image = self._get_color_image(frame)
                     else:
                         pil_image = self._get_image(frame)
-                    self._image_queue.put_nowait(pil_image)
-                    # only update live view when pair of images acquired
-                    if nr == 2: 
-                        if emit_signal:
+                    if self._is_deque:
+                        self._image_queue.append(pil_image)
+                    else:
+                        if self._image_queue.full():
+                            # Drop the oldest image to make room for the newest
+                            try:
+                                self._image_queue.get_nowait()
+                            except queue.Empty:
+                                pass
+                        self._image_queue.put_nowait(pil_image)
+                    nr ^= 1
+                    # only update live view when pair of images acquired and is waiting in the queue
+                    if nr == 0 and emit_signal:
+                        queued = len(self._image_queue) if self._is_deque else self._image_queue.qsize()
+                        if queued >= 2:
                             self._signal.new_image.emit(True)
-                        nr = 0
             except queue.Full:
-                # No point in keeping this image around when the queue is full, let's skip to the next one
+                # Another producer filled the shared queue in between, let's skip to the next one
                 nr = 0
                 pass
             except Exception as error:
@@ -157,15 +180,21 @@ class Camera():
     def initialize_camera(self):
         """Initialize the camera with current settings."""
         try:
+            # Read the settings once and validate them before touching the SDK or camera
+            settings = self.config_manager.get('settings')
+            if not isinstance(settings, dict):
+                raise ValueError("Configuration has no 'settings' section.")
+            exposure_time_us = settings.get("exposureTime_us")
+            if not isinstance(exposure_time_us, int) or isinstance(exposure_time_us, bool):
+                raise ValueError(f"'exposureTime_us' must be an integer, got {exposure_time_us!r}.")
             self.sdk = TLCameraSDK() 
             available_cameras = self.sdk.discover_available_cameras()
             if len(available_cameras) < 1:
                 raise CameraNotFoundError("Unable to access the camera.")
             # Open the first avalible camera found
             camera = self.sdk.open_camera(available_cameras[0])
-            settings = self.config_manager.get('settings')
             # Exposure time
-            camera.exposure_time_us = settings.get("exposureTime_us")
+            camera.exposure_time_us = exposure_time_us
             # Amount of frames aquired per trigger, zero for unlimitated
             camera.frames_per_trigger_zero_for_unlimited = 1 
             # Set operation mode to HARDWARE_TRIGGERED
@@ -253,9 +282,13 @@ class ThorlabsCameraHandler():
         if self.connected:
             # Dispose camera instance
             self.dispose_camera_instance()
-            # Empty image queue
-            with self.shared_queue.mutex:
-                self.shared_queue.queue.clear()
+            # Empty image queue through its public interface, a new internal deque is created if not shared
+            if self.shared_queue is not None:
+                while True:
+                    try:
+                        self.shared_queue.get_nowait()
+                    except queue.Empty:
+                        break
             # Initialize camera instance 
             self.initialize_camera()
             # Activate camera aqusition
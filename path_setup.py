@@ -11,28 +11,27 @@ but can be adjusted to work with custom programs. The following methods can also
 """
 import os
 import sys
+from pathlib import Path
+
+_configured = False
 
 def configure_path():
-    is_64bits = sys.maxsize > 2**32
+    global _configured
+    if _configured:
+        # Only add the DLL directory once, even if imported several times
+        return
 
-    full_path_current_directory = os.path.abspath(os.curdir)
-    current_directory = full_path_current_directory.split(os.sep)[-1]
-    
-    relative_path_to_dlls = '..' + os.sep + current_directory + os.sep + 'dlls' + os.sep
+    is_64bits = sys.maxsize > 2**32
 
-    if is_64bits:
-        relative_path_to_dlls += '64_lib'
-    else:
-        relative_path_to_dlls += '32_lib'
+    absolute_path_to_file_directory = Path(__file__).resolve().parent
 
-    absolute_path_to_file_directory = os.path.dirname(os.path.abspath(__file__))
+    absolute_path_to_dlls = absolute_path_to_file_directory / 'dlls' / ('64_lib' if is_64bits else '32_lib')
 
-    absolute_path_to_dlls = os.path.abspath(absolute_path_to_file_directory + os.sep + relative_path_to_dlls)
+    # Python 3.8 introduces a new method to specify dll directory. Done first so a failure leaves PATH untouched.
+    if hasattr(os, 'add_dll_directory'):
+        os.add_dll_directory(str(absolute_path_to_dlls))
 
-    os.environ['PATH'] = absolute_path_to_dlls + os.pathsep + os.environ['PATH']
+    os.environ['PATH'] = f"{absolute_path_to_dlls}{os.pathsep}{os.environ['PATH']}"
 
-    try:
-        # Python 3.8 introduces a new method to specify dll directory
-        os.add_dll_directory(absolute_path_to_dlls)
-    except AttributeError:
-        pass
+    # Only mark as done once everything succeeded, so a failed attempt can be retried
+    _configured = True